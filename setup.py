@@ -0,0 +1,27 @@
+"""
+Сборка необязательного ядра вычислений на Cython
+
+    python setup.py build_ext --inplace
+
+Модуль src/_eval подхватывается калькулятором автоматически,
+без него используется реализация на Python.
+"""
+
+import sys
+
+from setuptools import Extension, setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:  # Cython - необязательная зависимость
+    if 'build_ext' in sys.argv:
+        sys.exit("Cython is required to build src/_eval: pip install cython")
+    ext_modules = []
+else:
+    ext_modules = cythonize([Extension('src._eval', ['src/_eval.pyx'])])
+
+setup(
+    name='calculator-py',
+    py_modules=[],
+    ext_modules=ext_modules,
+)
@@ -0,0 +1,153 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Ядро вычисления ОПН на C
+
+Необязательное расширение, собирается командой
+    python setup.py build_ext --inplace
+Без него калькулятор вычисляет выражения средствами Python.
+"""
+
+from cpython.mem cimport PyMem_Malloc, PyMem_Free
+from libc.math cimport copysign, floor, fmod, isfinite, isinf, pow
+from libc.stdint cimport int8_t
+
+# Коды операций совпадают с OP_* из calculator.py
+cdef enum:
+    OP_ADD = 0
+    OP_SUB = 1
+    OP_MUL = 2
+    OP_DIV = 3
+    OP_MOD = 4
+    OP_POW = 5
+    OP_NEG = 6
+    OP_PUSH = 7
+
+# Коды завершения стековой машины
+cdef enum:
+    STATUS_OK = 0
+    STATUS_ZERO_DIVISION = 1
+    STATUS_OVERFLOW = 2
+    STATUS_COMPLEX = 3
+    STATUS_INVALID = 4
+
+
+cdef int _run(const int8_t* ops, const double* consts, Py_ssize_t n,
+              Py_ssize_t n_consts, double* stack, double* result) noexcept nogil:
+    """Стековая машина; арифметика повторяет семантику float в Python"""
+    cdef Py_ssize_t i
+    cdef Py_ssize_t sp = 0
+    cdef Py_ssize_t ci = 0
+    cdef int8_t op
+    cdef double left, right, value
+
+    # Проверки границ отключены, поэтому ОПН проверяется до вычисления:
+    # коды операций, глубина стека и число констант
+    for i in range(n):
+        op = ops[i]
+        if op == OP_PUSH:
+            sp += 1
+            ci += 1
+        elif op == OP_NEG:
+            if sp < 1:
+                return STATUS_INVALID
+        elif OP_ADD <= op <= OP_POW:
+            if sp < 2:
+                return STATUS_INVALID
+            sp -= 1
+        else:
+            return STATUS_INVALID
+    if sp != 1 or ci != n_consts:
+        return STATUS_INVALID
+
+    sp = 0
+    ci = 0
+    for i in range(n):
+        op = ops[i]
+        if op == OP_PUSH:
+            stack[sp] = consts[ci]
+            sp += 1
+            ci += 1
+        elif op == OP_NEG:
+            stack[sp - 1] = -stack[sp - 1]
+        else:
+            sp -= 1
+            right = stack[sp]
+            left = stack[sp - 1]
+            if op == OP_ADD:
+                value = left + right
+            elif op == OP_SUB:
+                value = left - right
+            elif op == OP_MUL:
+                value = left * right
+            elif op == OP_DIV:
+                if right == 0:
+                    return STATUS_ZERO_DIVISION
+                value = left / right
+            elif op == OP_MOD:
+                if right == 0:
+                    return STATUS_ZERO_DIVISION
+                # Знак остатка совпадает со знаком делителя, как в Python
+                value = fmod(left, right)
+                if value == 0:
+                    value = copysign(0.0, right)
+                elif (value < 0) != (right < 0):
+                    value += right
+            else:
+                # 0 ^ -inf в Python равно inf, а не ошибка
+                if left == 0 and right < 0 and isfinite(right):
+                    return STATUS_ZERO_DIVISION
+                if left < 0 and right != floor(right):
+                    return STATUS_COMPLEX
+                value = pow(left, right)
+                if isinf(value) and isfinite(left) and isfinite(right):
+                    return STATUS_OVERFLOW
+            stack[sp - 1] = value
+
+    result[0] = stack[0]
+    return STATUS_OK
+
+
+def eval_rpn(const int8_t[::1] ops, const double[::1] consts):
+    """
+    Вычисляет ОПН, закодированную кодами операций и константами
+
+    Args:
+        ops: Коды операций (int8)
+        consts: Константы (float64) в порядке их появления в ОПН
+
+    Returns:
+        Результат вычисления или None, если результат комплексный
+        и его нужно считать средствами Python
+
+    Raises:
+        ValueError: При неизвестном коде операции, нехватке операндов
+            или несовпадении числа констант
+    """
+    cdef Py_ssize_t n = ops.shape[0]
+    cdef double result = 0.0
+    cdef int status
+    cdef double* stack
+
+    if n == 0 or consts.shape[0] == 0:
+        raise ValueError("Invalid expression")
+
+    stack = <double*> PyMem_Malloc(n * sizeof(double))
+    if stack == NULL:
+        raise MemoryError()
+
+    try:
+        with nogil:
+            status = _run(&ops[0], &consts[0], n, consts.shape[0], stack, &result)
+    finally:
+        PyMem_Free(stack)
+
+    if status == STATUS_INVALID:
+        raise ValueError("Invalid expression")
+    if status == STATUS_ZERO_DIVISION:
+        raise ZeroDivisionError("Division by zero")
+    if status == STATUS_OVERFLOW:
+        raise OverflowError("Numerical result out of range")
+    if status == STATUS_COMPLEX:
+        return None
+
+    return result
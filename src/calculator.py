@@ -3,41 +3,722 @@
 Поддерживает унарный минус и возведение в степень
 """
 
+import functools
+import math
 import operator
-from typing import List, Union
+import re
+from array import array
+from types import MappingProxyType
+from typing import Callable, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy - необязательная зависимость
+    np = None
+
+try:
+    from numba import njit, prange, typeof
+except ImportError:  # Numba - необязательная зависимость
+    njit = None
+
+try:
+    from _eval import eval_rpn as _c_eval_rpn
+except ImportError:  # Ядро на Cython не собрано (см. setup.py)
+    _c_eval_rpn = None
+
+# Виды токенов, которые возвращает токенизатор
+_NUM = 0
+_OP = 1
+_LPAREN = 2
+_RPAREN = 3
+_UNKNOWN = 4
+
+# Может ли следующий минус быть унарным, индекс - вид текущего токена
+_NEXT_UNARY = (False, True, True, False)
+
+# Токен с ведущими пробелами; номер сработавшей группы минус один - вид токена
+_TOKEN_RE = re.compile(r'\s*(?:(\d+\.?\d*|\.\d+)|([-+*/%^])|(\()|(\))|(\S))')
+
+# Коды операций для числовых ядер
+OP_ADD = 0
+OP_SUB = 1
+OP_MUL = 2
+OP_DIV = 3
+OP_MOD = 4
+OP_POW = 5
+OP_NEG = 6
+OP_PUSH = 7
+
+# Коды завершения скалярного ядра Numba, совпадают с STATUS_* из _eval.pyx
+_STATUS_OK = 0
+_STATUS_ZERO_DIVISION = 1
+_STATUS_OVERFLOW = 2
+_STATUS_COMPLEX = 3
+
+_OPCODES = {'+': OP_ADD, '-': OP_SUB, '*': OP_MUL, '/': OP_DIV,
+            '%': OP_MOD, '^': OP_POW, 'u': OP_NEG}
+
+# Приоритет операторов (чем выше число, тем выше приоритет)
+PRECEDENCE = {
+    '+': 1,
+    '-': 1,
+    '*': 2,
+    '/': 2,
+    '%': 2,
+    '^': 3,
+    'u': 4  # Унарный минус
+}
+
+# Операторы и соответствующие функции
+OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+    '^': operator.pow,
+    'u': operator.neg
+}
+
+# Право-ассоциативные операторы: 2^3^2 = 2^(3^2), --5 = -(-5)
+_RIGHT_ASSOC = frozenset((OP_POW, OP_NEG))
+
+# Символы, приоритеты и функции операторов, индекс - код операции
+_SYMBOLS = ('+', '-', '*', '/', '%', '^', 'u')
+_PREC = tuple(PRECEDENCE[symbol] for symbol in _SYMBOLS)
+_DISPATCH = tuple(OPERATORS[symbol] for symbol in _SYMBOLS)
+
+# Бинарные операторы в исходном коде Python, индекс - код операции
+_PY_OPERATORS = ('+', '-', '*', '/', '%', '**')
+
+# Токен ОПН: (_NUM, значение) или (_OP, код операции)
+Token = Tuple[int, Union[float, int]]
+
+# Глобальное пространство имён для вычисления сгенерированного кода
+_EVAL_GLOBALS = {'__builtins__': {'float': float}}
+
+
+def _tokenize(expression: str) -> List[Tuple[int, Union[float, str]]]:
+    """Разбивает выражение на токены (тип, значение) одним проходом регулярного выражения"""
+    tokens = []
+
+    # Унарный минус здесь не выделяется - это делает to_rpn
+    for match in _TOKEN_RE.finditer(expression):
+        kind = match.lastindex - 1
+        token = match.group(match.lastindex)
+
+        if kind == _NUM:
+            # Число разбирается один раз, дальше хранится float
+            tokens.append((kind, float(token)))
+        elif kind == _UNKNOWN:
+            raise ValueError(f"Unexpected character: {token}")
+        else:
+            tokens.append((kind, token))
+
+    return tokens
+
+
+def to_rpn(expression: str, fold: bool = False) -> List[Token]:
+    """
+    Преобразует выражение в ОПН алгоритмом сортировочной станции
+
+    Args:
+        expression: Выражение в инфиксной нотации
+        fold: Вычислять ли операторы над числами сразу (свёртка констант);
+            выражение без переменных при этом сворачивается в одно число
+
+    Returns:
+        Токены ОПН: (_NUM, число) или (_OP, код операции)
+
+    Raises:
+        ValueError: При неизвестном символе, несогласованных скобках
+            или пропущенном операторе/операнде
+    """
+    output = []
+    stack = []  # Коды операций и открывающие скобки
+    prec = _PREC
+    tokens = _tokenize(expression)
+    may_be_unary = True  # Флаг для определения унарного минуса
+
+    for kind, token in tokens:
+        # На месте операнда допустимы число, '(' и унарный минус,
+        # после операнда - бинарный оператор или ')'
+        if ((kind == _OP and token != '-') if may_be_unary
+                else kind in (_NUM, _LPAREN)):
+            raise ValueError(f"Unexpected token: {token}")
+
+        if kind == _NUM:
+            output.append((_NUM, token))
+        elif kind == _OP:
+            # Проверяем, является ли минус унарным
+            if may_be_unary and token == '-':
+                token = 'u'
+
+            op = _OPCODES[token]
+
+            # Выталкиваем операторы с более высоким приоритетом, а при равном -
+            # только если текущий оператор лево-ассоциативный
+            while (stack and stack[-1] != '(' and
+                   (prec[stack[-1]] > prec[op] or
+                    (prec[stack[-1]] == prec[op] and op not in _RIGHT_ASSOC))):
+                _emit_operator(output, stack.pop(), fold)
+
+            stack.append(op)
+        elif kind == _LPAREN:
+            stack.append(token)
+        else:
+            # Выталкиваем все операторы до открывающей скобки
+            while stack and stack[-1] != '(':
+                _emit_operator(output, stack.pop(), fold)
+
+            if not stack:
+                raise ValueError("Mismatched parentheses")
+
+            stack.pop()  # Удаляем '('
+
+        may_be_unary = _NEXT_UNARY[kind]
+
+    # Выталкиваем оставшиеся операторы
+    while stack:
+        if stack[-1] == '(':
+            raise ValueError("Mismatched parentheses")
+        _emit_operator(output, stack.pop(), fold)
+
+    return output
+
+
+def _emit_operator(output: List[Token], op: int, fold: bool) -> None:
+    """Добавляет оператор в ОПН, при fold сворачивая его с числовыми операндами"""
+    if fold and output and output[-1][0] == _NUM:
+        if op == OP_NEG:
+            output[-1] = (_NUM, -output[-1][1])
+            return
+        if len(output) > 1 and output[-2][0] == _NUM:
+            try:
+                value = _DISPATCH[op](output[-2][1], output[-1][1])
+            except ArithmeticError:
+                # Деление на ноль и переполнение возбудит само вычисление
+                value = None
+            # Комплексный результат оставляем вычислению
+            if isinstance(value, float):
+                del output[-1]
+                output[-1] = (_NUM, value)
+                return
+
+    output.append((_OP, op))
+
+
+def _prepare_constant(rpn: List[Token]) -> Optional[Callable[[], float]]:
+    """ОПН, свёрнутая в одно число"""
+    if len(rpn) != 1:
+        return None
+    value = rpn[0][1]
+    return lambda: value
+
+
+def _prepare_bytecode(rpn: List[Token]) -> Optional[Callable[[], float]]:
+    """Байт-код Python, скомпилированный из ОПН"""
+    try:
+        code = compile(rpn_to_source(rpn), '<calc>', 'eval')
+    except (SyntaxError, RecursionError, MemoryError):
+        # Парсер Python ограничивает вложенность скобок
+        return None
+    return functools.partial(eval, code, _EVAL_GLOBALS)
+
+
+def _prepare_cython(rpn: List[Token]) -> Optional[Callable[[], float]]:
+    """Ядро на C, если расширение _eval собрано"""
+    if _c_eval_rpn is None:
+        return None
+    ops, consts = _encode(rpn)
+    native = array('b', ops), array('d', consts)
+
+    def run_native() -> float:
+        result = _c_eval_rpn(*native)
+        # Комплексный результат ядро на C не представляет
+        return evaluate_program(rpn) if result is None else result
+    return run_native
+
+
+def _prepare_numba(rpn: List[Token]) -> Optional[Callable[[], float]]:
+    """Ядро Numba, если она установлена"""
+    if _eval_kernel is None:
+        return None
+    arrays = compile_to_arrays(rpn)
+    try:
+        # Компиляция ядра заранее: сбой JIT - повод перейти к следующему способу
+        _eval_kernel.compile(tuple(typeof(a) for a in arrays))
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+    def run_numba() -> float:
+        status, result = _eval_kernel(*arrays)
+        # Ядро останавливается там, где Python возбудит исключение или
+        # вернёт комплексное число: такие выражения пересчитываем
+        return result if status == _STATUS_OK else evaluate_program(rpn)
+    return run_numba
+
+
+def _prepare_python(rpn: List[Token]) -> Callable[[], float]:
+    """Интерпретатор ОПН из кодов операций, доступен всегда"""
+    return functools.partial(evaluate_program, rpn)
+
+
+# Способы вычисления CompiledExpression в порядке предпочтения: имя и функция,
+# которая готовит вычисление или возвращает None, если способ недоступен
+_BACKENDS = (
+    ('constant', _prepare_constant),
+    ('bytecode', _prepare_bytecode),
+    ('cython', _prepare_cython),
+    ('numba', _prepare_numba),
+    ('python', _prepare_python),
+)
+
+
+class CompiledExpression:
+    """
+    Выражение, разобранное один раз и готовое к многократному вычислению
+
+    При создании выбирается самый быстрый доступный способ вычисления,
+    по порядку из _BACKENDS:
+        constant - ОПН свёрнута в одно число, вычислять нечего;
+        bytecode - ОПН переводится в код Python и компилируется в байт-код;
+        cython   - ядро на C (если расширение _eval собрано);
+        numba    - ядро, скомпилированное Numba (если она установлена);
+        python   - интерпретатор ОПН из кодов операций, доступен всегда.
+    Если способ недоступен или не справился с выражением (например,
+    слишком глубокая вложенность для компилятора Python), берётся следующий.
+    """
+
+    def __init__(self, rpn: List[Token], backend: Optional[str] = None):
+        """
+        Args:
+            rpn: Токены ОПН
+            backend: Способ вычисления; по умолчанию - первый доступный
+
+        Raises:
+            ValueError: При неверной ОПН или недоступном способе вычисления
+        """
+        _check_stack_depth(rpn)
+        self.rpn = rpn
+        self.backend = None
+        self._run = None
+
+        backends = _BACKENDS
+        if backend is not None:
+            backends = tuple(item for item in _BACKENDS if item[0] == backend)
+            if not backends:
+                raise ValueError(f"Unknown backend: {backend}")
+
+        for name, prepare in backends:
+            self._run = prepare(rpn)
+            if self._run is not None:
+                self.backend = name
+                break
+        else:
+            raise ValueError(f"Backend is unavailable: {backend}")
+
+    def evaluate(self) -> float:
+        """Вычисляет выражение выбранным способом"""
+        return self._run()
+
+
+def evaluate_program(rpn: List[Token]) -> float:
+    """
+    Вычисляет ОПН из кодов операций
+
+    Args:
+        rpn: Токены ОПН, уже проверенные на нехватку операндов
+
+    Returns:
+        Результат вычисления
+    """
+    # Глубина стека не превышает длины ОПН: выделяем его заранее
+    stack = [0.0] * len(rpn)
+    sp = 0
+    dispatch = _DISPATCH
+
+    for kind, value in rpn:
+        if kind == _NUM:
+            stack[sp] = value
+            sp += 1
+        elif value == OP_NEG:
+            # Унарный оператор - один операнд
+            stack[sp - 1] = -stack[sp - 1]
+        else:
+            # Бинарный оператор - два операнда
+            sp -= 1
+            stack[sp - 1] = dispatch[value](stack[sp - 1], stack[sp])
+
+    if sp != 1:
+        raise ValueError("Invalid expression")
+
+    return stack[0]
+
+
+def evaluate_rpn(rpn: List[Token]) -> float:
+    """
+    Вычисляет выражение в обратной польской нотации
+
+    Args:
+        rpn: Токены ОПН вида (_NUM, число) или (_OP, код операции)
+
+    Returns:
+        Результат вычисления
+
+    Raises:
+        ValueError: Если операндов не хватает или их остаётся больше одного
+    """
+    _check_stack_depth(rpn)
+    return evaluate_program(rpn)
+
+
+def rpn_to_source(rpn: List[Token]) -> str:
+    """
+    Переводит ОПН в эквивалентное выражение на Python
+
+    Args:
+        rpn: Токены ОПН
+
+    Returns:
+        Исходный код выражения, например "((2.0)+((3.0)*(4.0)))"
+
+    Raises:
+        ValueError: Если операндов не хватает или их остаётся больше одного
+    """
+    stack = []
+
+    for kind, value in rpn:
+        if kind == _NUM:
+            stack.append(_literal(value))
+        elif value == OP_NEG:
+            if not stack:
+                raise ValueError("Insufficient operands for operator")
+            stack.append(f"(-{stack.pop()})")
+        else:
+            if len(stack) < 2:
+                raise ValueError("Insufficient operands for operator")
+            right = stack.pop()
+            left = stack.pop()
+            stack.append(f"({left}{_PY_OPERATORS[value]}{right})")
+
+    if len(stack) != 1:
+        raise ValueError("Invalid expression")
+
+    return stack[0]
+
+
+def format_rpn(rpn: List[Token]) -> List[str]:
+    """
+    Переводит токены ОПН в строки для вывода
+
+    Args:
+        rpn: Токены ОПН
+
+    Returns:
+        Список строк, например ['3', '4', '+']
+    """
+    return [_format_number(value) if kind == _NUM else _SYMBOLS[value]
+            for kind, value in rpn]
+
+
+def parse_rpn(tokens: List[str]) -> List[Token]:
+    """
+    Переводит строки ОПН обратно в токены, обратная операция к format_rpn
+
+    Args:
+        tokens: Список строк, например ['3', '4', '+']
+
+    Returns:
+        Токены ОПН
+
+    Raises:
+        ValueError: При строке, не являющейся ни оператором, ни числом
+    """
+    return [(_OP, _OPCODES[token]) if token in _OPCODES else (_NUM, float(token))
+            for token in tokens]
+
+
+def _format_number(value: float) -> str:
+    """Запись числа без лишнего '.0' у целых значений"""
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _literal(value: float) -> str:
+    """Запись числа в исходном коде Python"""
+    if math.isfinite(value):
+        return f"({value!r})"
+    return f"float('{value!r}')"
+
+
+def _check_stack_depth(rpn: List[Token]) -> None:
+    """Проверяет, что каждому оператору хватает операндов и результат один"""
+    depth = 0
+
+    for kind, value in rpn:
+        if kind == _NUM:
+            depth += 1
+        elif value == OP_NEG:
+            if depth < 1:
+                raise ValueError("Insufficient operands for operator")
+        else:
+            if depth < 2:
+                raise ValueError("Insufficient operands for operator")
+            depth -= 1
+
+    if depth != 1:
+        raise ValueError("Invalid expression")
+
+
+def _encode(rpn: List[Token]) -> Tuple[List[int], List[float]]:
+    """
+    Кодирует ОПН в коды операций и список констант, проверяя глубину стека
+
+    Raises:
+        ValueError: Если операндов не хватает или их остаётся больше одного
+    """
+    _check_stack_depth(rpn)
+    ops = [OP_PUSH if kind == _NUM else value for kind, value in rpn]
+    consts = [value for kind, value in rpn if kind == _NUM]
+    return ops, consts
+
+
+def compile_to_arrays(rpn: List[Token]) -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Преобразует ОПН в массивы для числовых ядер
+
+    Args:
+        rpn: Токены ОПН
+
+    Returns:
+        Массив кодов операций (int8) и массив констант (float64)
+        в порядке их появления в ОПН
+    """
+    if np is None:
+        raise ImportError("compile_to_arrays requires numpy")
+
+    ops, consts = _encode(rpn)
+    return np.array(ops, dtype=np.int8), np.array(consts, dtype=np.float64)
+
+
+def _run_stack_machine(ops, consts):
+    """Стековая машина над массивами кодов операций и констант"""
+    stack = np.empty(ops.shape[0])
+    sp = 0
+    ci = 0
+
+    for i in range(ops.shape[0]):
+        op = ops[i]
+        if op == OP_PUSH:
+            stack[sp] = consts[ci]
+            sp += 1
+            ci += 1
+        elif op == OP_NEG:
+            stack[sp - 1] = -stack[sp - 1]
+        else:
+            sp -= 1
+            right = stack[sp]
+            left = stack[sp - 1]
+            if op == OP_ADD:
+                stack[sp - 1] = left + right
+            elif op == OP_SUB:
+                stack[sp - 1] = left - right
+            elif op == OP_MUL:
+                stack[sp - 1] = left * right
+            elif op == OP_DIV:
+                stack[sp - 1] = left / right
+            elif op == OP_MOD:
+                stack[sp - 1] = left % right
+            else:
+                stack[sp - 1] = left ** right
+
+    return stack[0]
+
+
+def _checked_binary(op, left, right):
+    """
+    Бинарная операция с кодом завершения вместо inf/nan там, где float
+    в Python возбудил бы исключение или дал комплексное число
+
+    Returns:
+        Код завершения _STATUS_* и результат, если код _STATUS_OK
+    """
+    status = _STATUS_OK
+    value = 0.0
+    if op == OP_ADD:
+        value = left + right
+    elif op == OP_SUB:
+        value = left - right
+    elif op == OP_MUL:
+        value = left * right
+    elif op in (OP_DIV, OP_MOD):
+        if right == 0:
+            status = _STATUS_ZERO_DIVISION
+        else:
+            value = left / right if op == OP_DIV else left % right
+    # 0 ^ -inf в Python равно inf, а не ошибка
+    elif left == 0 and right < 0 and math.isfinite(right):
+        status = _STATUS_ZERO_DIVISION
+    elif left < 0 and right != math.floor(right):
+        status = _STATUS_COMPLEX
+    else:
+        value = left ** right
+        if math.isinf(value) and math.isfinite(left) and math.isfinite(right):
+            status = _STATUS_OVERFLOW
+
+    return status, value
+
+
+def _run_checked_stack_machine(ops, consts):
+    """
+    Стековая машина, которая останавливается на первой ошибочной операции
+
+    Промежуточные inf/nan нельзя распознать по итоговому значению:
+    1 / 10 ^ 400 даёт 0.0, а ((-8) ^ 0.5) ^ 0 - 1.0, поэтому проверяется
+    каждая операция, как в ядре на Cython.
+
+    Returns:
+        Код завершения _STATUS_* и результат, если код _STATUS_OK
+    """
+    stack = np.empty(ops.shape[0])
+    sp = 0
+    ci = 0
+
+    for i in range(ops.shape[0]):
+        op = ops[i]
+        if op == OP_PUSH:
+            stack[sp] = consts[ci]
+            sp += 1
+            ci += 1
+        elif op == OP_NEG:
+            stack[sp - 1] = -stack[sp - 1]
+        else:
+            sp -= 1
+            status, value = _checked_binary(op, stack[sp - 1], stack[sp])
+            if status != _STATUS_OK:
+                return status, 0.0
+            stack[sp - 1] = value
+
+    return _STATUS_OK, stack[0]
+
+
+if njit is not None:
+    # Скалярное ядро: сообщает код завершения вместо inf/nan
+    _checked_binary = njit(cache=True)(_checked_binary)
+    _eval_kernel = njit(cache=True)(_run_checked_stack_machine)
+    # Ядро для пакетов: ошибки арифметики дают inf/nan, как в NumPy
+    _eval_row_kernel = njit(error_model='numpy', cache=True)(_run_stack_machine)
+
+    @njit(parallel=True, cache=True)
+    def _eval_batch_kernel(ops, consts_matrix):
+        """Вычисляет выражение для каждой строки матрицы констант"""
+        result = np.empty(consts_matrix.shape[0])
+        for row in prange(consts_matrix.shape[0]):
+            result[row] = _eval_row_kernel(ops, consts_matrix[row])
+        return result
+else:
+    _eval_kernel = None
+    _eval_batch_kernel = None
+
+
+def evaluate_batch(rpn: List[Token], consts_matrix) -> 'np.ndarray':
+    """
+    Вычисляет выражение для набора значений его констант
+
+    Каждая строка матрицы подставляется вместо чисел ОПН в порядке их
+    появления, что позволяет прогонять одно выражение по сетке параметров.
+    Деление на ноль даёт inf/nan вместо исключения. Используется ядро Numba,
+    а без него - векторные операции NumPy над столбцами матрицы.
+
+    Args:
+        rpn: Токены ОПН
+        consts_matrix: Матрица формы (N, k), k - количество чисел в ОПН
+
+    Returns:
+        Массив из N результатов
+    """
+    ops, consts = compile_to_arrays(rpn)
+    consts_matrix = np.ascontiguousarray(consts_matrix, dtype=np.float64)
+    if consts_matrix.ndim != 2 or consts_matrix.shape[1] != consts.shape[0]:
+        raise ValueError(f"Expected a matrix with {consts.shape[0]} columns")
+
+    if _eval_batch_kernel is not None:
+        return _eval_batch_kernel(ops, consts_matrix)
+    return _evaluate_batch_numpy(ops, consts_matrix)
+
+
+def _evaluate_batch_numpy(ops: 'np.ndarray', consts_matrix: 'np.ndarray') -> 'np.ndarray':
+    """Стековая машина, где каждый элемент стека - массив из N значений"""
+    ufuncs = (np.add, np.subtract, np.multiply, np.true_divide, np.mod, np.power)
+    # Столбцы подряд в памяти: по одному на каждое число ОПН
+    columns = np.ascontiguousarray(consts_matrix.T)
+    size = consts_matrix.shape[0]
+    # Элементы стека - пары (массив, принадлежит ли он пулу буферов);
+    # столбцы входной матрицы не перезаписываются
+    stack = []
+    pool = []
+    ci = 0
+
+    def take_buffer():
+        return pool.pop() if pool else np.empty(size)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for op in ops:
+            if op == OP_PUSH:
+                stack.append((columns[ci], False))
+                ci += 1
+            elif op == OP_NEG:
+                value, owned = stack.pop()
+                out = value if owned else take_buffer()
+                stack.append((np.negative(value, out=out), True))
+            else:
+                right, right_owned = stack.pop()
+                left, left_owned = stack.pop()
+                if left_owned:
+                    out = left
+                elif right_owned:
+                    out = right
+                else:
+                    out = take_buffer()
+                ufuncs[op](left, right, out=out)
+                # Второй буфер освобождается для следующих операций
+                if left_owned and right_owned:
+                    pool.append(right)
+                stack.append((out, True))
+
+    result, owned = stack[0]
+    return result if owned else result.copy()
+
+
+def _cache_key(expression: str) -> str:
+    """Нормализует пробелы в выражении для ключа кэша"""
+    # Серии пробельных символов схлопываются в один пробел за один проход на C:
+    # пробел между числами значим, поэтому убирать его совсем нельзя
+    return ' '.join(expression.split())
+
 
 class Calculator:
     """Калькулятор с поддержкой ОПН и унарных операторов"""
 
     def __init__(self):
-        # Приоритет операторов (чем выше число, тем выше приоритет)
-        self.precedence = {
-            '+': 1,
-            '-': 1,
-            '*': 2,
-            '/': 2,
-            '%': 2,
-            '^': 3,
-            'u': 4  # Унарный минус
-        }
-
-        # Операторы и соответствующие функции
-        self.operators = {
-            '+': operator.add,
-            '-': operator.sub,
-            '*': operator.mul,
-            '/': operator.truediv,
-            '%': operator.mod,
-            '^': operator.pow,
-            'u': lambda x: -x
-        }
-
-    def calculate(self, expression: str) -> float:
+        # Таблицы операторов только для чтения: разбор использует таблицы
+        # модуля, поэтому их изменение через экземпляр ни на что бы не влияло
+        self.precedence = MappingProxyType(PRECEDENCE)
+        self.operators = MappingProxyType(OPERATORS)
+
+        # Кэши разобранных выражений и результатов: ключ - выражение
+        # с нормализованными пробелами. Выражения не содержат переменных,
+        # поэтому результат зависит только от текста
+        self._compile_cached = functools.lru_cache(maxsize=1024)(self._compile)
+        self._result_cached = functools.lru_cache(maxsize=4096)(self._evaluate)
+
+    def calculate(self, expression: str, verbose: bool = False) -> float:
         """
-        Вычисляет математическое выражение с выводом в консоль
+        Вычисляет математическое выражение
 
         Args:
             expression: Строка с математическим выражением
+            verbose: Выводить ли ход вычисления в консоль
 
         Returns:
             Результат вычисления
@@ -46,23 +727,54 @@ class Calculator:
             ValueError: При неверном выражении
             ZeroDivisionError: При делении на ноль
         """
-        if not expression or expression.strip() == "":
+        if not expression or expression.isspace():
             raise ValueError("Expression cannot be empty")
 
-        print(f"\n🧮 Вычисление выражения: {expression}")
-        print("=" * 50)
+        if verbose:
+            print(f"\n🧮 Вычисление выражения: {expression}")
+            print("=" * 50)
 
-        # Преобразуем в ОПН
-        rpn = self.to_reverse_polish_notation(expression)
-        print(f"📋 Обратная польская запись: {' '.join(rpn)}")
+        key = _cache_key(expression)
+        if verbose:
+            # Выводим ОПН до свёртки констант
+            rpn = self.to_reverse_polish_notation(expression)
+            print(f"📋 Обратная польская запись: {' '.join(rpn)}")
 
-        # Вычисляем результат
-        result = self.evaluate_rpn(rpn)
-        print(f"✅ Результат: {result}")
-        print("=" * 50)
+        # Вычисляем результат (или берём готовый из кэша)
+        result = self._result_cached(key)
+        if verbose:
+            print(f"✅ Результат: {result}")
+            print("=" * 50)
 
         return result
 
+    def compile(self, expression: str) -> CompiledExpression:
+        """
+        Разбирает выражение один раз для последующих вычислений
+
+        Повторные вызовы с тем же выражением берут результат из LRU-кэша.
+
+        Args:
+            expression: Выражение в инфиксной нотации
+
+        Returns:
+            Скомпилированное выражение
+        """
+        return self._compile_cached(_cache_key(expression))
+
+    def clear_cache(self) -> None:
+        """Очищает кэши разобранных выражений и результатов"""
+        self._compile_cached.cache_clear()
+        self._result_cached.cache_clear()
+
+    def _compile(self, expression: str) -> CompiledExpression:
+        """Строит скомпилированное выражение (без кэширования)"""
+        return CompiledExpression(to_rpn(expression, fold=True))
+
+    def _evaluate(self, expression: str) -> float:
+        """Вычисляет нормализованное выражение (без кэширования результата)"""
+        return self._compile_cached(expression).evaluate()
+
     def to_reverse_polish_notation(self, expression: str) -> List[str]:
         """
         Преобразует инфиксную нотацию в обратную польскую нотацию
@@ -73,147 +785,22 @@ class Calculator:
         Returns:
             Список токенов в ОПН
         """
-        output = []
-        stack = []
-        tokens = self._tokenize(expression)
-        may_be_unary = True  # Флаг для определения унарного минуса
-
-        for token in tokens:
-            if self._is_number(token):
-                output.append(token)
-                may_be_unary = False
-            elif self._is_operator(token):
-                # Проверяем, является ли минус унарным
-                if may_be_unary and token == '-':
-                    token = 'u'
-
-                # Выталкиваем операторы с более высоким или равным приоритетом
-                # Для право-ассоциативных операторов (^) используем строгое неравенство
-                while (stack and self._is_operator(stack[-1]) and
-                       ((self._get_precedence(token) < self._get_precedence(stack[-1])) or
-                        (self._get_precedence(token) == self._get_precedence(stack[-1]) and
-                         self._is_left_associative(token)))):
-                    output.append(stack.pop())
-
-                stack.append(token)
-                may_be_unary = True
-            elif token == '(':
-                stack.append(token)
-                may_be_unary = True
-            elif token == ')':
-                # Выталкиваем все операторы до открывающей скобки
-                while stack and stack[-1] != '(':
-                    output.append(stack.pop())
-
-                if not stack:
-                    raise ValueError("Mismatched parentheses")
-
-                stack.pop()  # Удаляем '('
-                may_be_unary = False
-
-        # Выталкиваем оставшиеся операторы
-        while stack:
-            if stack[-1] == '(':
-                raise ValueError("Mismatched parentheses")
-            output.append(stack.pop())
+        return format_rpn(to_rpn(expression))
 
-        return output
-
-    def evaluate_rpn(self, rpn: List[str]) -> float:
+    def evaluate_rpn(self, rpn: Union[List[str], List[Token]]) -> float:
         """
         Вычисляет выражение в обратной польской нотации
 
         Args:
-            rpn: Список токенов в ОПН
+            rpn: Строки ОПН, как их возвращает to_reverse_polish_notation,
+                или токены вида (_NUM, число) / (_OP, код операции)
 
         Returns:
             Результат вычисления
         """
-        stack = []
-
-        for token in rpn:
-            if self._is_number(token):
-                stack.append(float(token))
-            elif self._is_operator(token):
-                if token == 'u':
-                    # Унарный оператор - один операнд
-                    if not stack:
-                        raise ValueError("Insufficient operands for unary operator")
-                    operand = stack.pop()
-                    result = self.operators[token](operand)
-                    stack.append(result)
-                else:
-                    # Бинарный оператор - два операнда
-                    if len(stack) < 2:
-                        raise ValueError("Insufficient operands for binary operator")
-                    right = stack.pop()
-                    left = stack.pop()
-
-                    if token == '/' and right == 0:
-                        raise ZeroDivisionError("Division by zero")
-
-                    result = self.operators[token](left, right)
-                    stack.append(result)
-
-        if len(stack) != 1:
-            raise ValueError("Invalid expression")
-
-        return stack[0]
-
-    def _tokenize(self, expression: str) -> List[str]:
-        """Разбивает выражение на токены"""
-        tokens = []
-        current = []
-        expression = expression.replace(' ', '')
-
-        i = 0
-        while i < len(expression):
-            char = expression[i]
-
-            if char.isdigit() or char == '.':
-                current.append(char)
-            else:
-                if current:
-                    tokens.append(''.join(current))
-                    current = []
-
-                # Обработка унарного минуса
-                if (char == '-' and
-                    (i == 0 or
-                     expression[i-1] == '(' or
-                     self._is_operator(expression[i-1]))):
-                    tokens.append('-')  # Будет обработан как унарный в RPN
-                else:
-                    tokens.append(char)
-
-            i += 1
-
-        if current:
-            tokens.append(''.join(current))
-
-        return tokens
-
-    def _is_number(self, token: str) -> bool:
-        """Проверяет, является ли токен числом"""
-        try:
-            float(token)
-            return True
-        except ValueError:
-            return False
-
-    def _is_operator(self, token: str) -> bool:
-        """Проверяет, является ли токен оператором"""
-        return token in self.precedence or token in ['-', '+', '*', '/', '%', '^']
-
-    def _get_precedence(self, operator: str) -> int:
-        """Возвращает приоритет оператора"""
-        return self.precedence.get(operator, 0)
-
-    def _is_left_associative(self, operator: str) -> bool:
-        """Проверяет, является ли оператор лево-ассоциативным"""
-        # Возведение в степень - право-ассоциативно
-        # Остальные операторы - лево-ассоциативные
-        return operator != '^'
+        if rpn and isinstance(rpn[0], str):
+            rpn = parse_rpn(rpn)
+        return evaluate_rpn(rpn)
 
 
 def main():
@@ -241,7 +828,7 @@ def main():
                 print("⚠️  Пустой ввод. Попробуйте снова.")
                 continue
 
-            result = calc.calculate(user_input)
+            calc.calculate(user_input, verbose=True)
 
         except KeyboardInterrupt:
             print("\n\n👋 До свидания!")
@@ -1,13 +1,16 @@
 import pytest
 from unittest.mock import patch
 from io import StringIO
+from array import array
 import sys
 import os
 
 # Добавляем src в путь импорта
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
 
-from calculator import Calculator
+from calculator import (Calculator, CompiledExpression, OP_ADD, OP_DIV, OP_MUL, OP_NEG,
+                        compile_to_arrays, evaluate_batch, format_rpn, parse_rpn, rpn_to_source,
+                        to_rpn, _encode, _evaluate_batch_numpy)
 
 
 class TestCalculator:
@@ -31,6 +34,11 @@ class TestCalculator:
             assert self.calc.calculate("(2 + 3) * 4") == 20
             assert self.calc.calculate("2 * 3 + 4") == 10
 
+        # Таблицы операторов доступны только для чтения
+        assert self.calc.precedence['^'] > self.calc.precedence['*']
+        with pytest.raises(TypeError):
+            self.calc.precedence['+'] = 5
+
     def test_exponentiation(self):
         """Тест возведения в степень"""
         with patch('sys.stdout', new_callable=StringIO):
@@ -48,6 +56,8 @@ class TestCalculator:
             assert self.calc.calculate("2 + -4") == -2
             assert self.calc.calculate("2 * -3") == -6
             assert self.calc.calculate("-2 ^ 3") == -8
+            assert self.calc.calculate("--5") == 5
+            assert self.calc.calculate("2 ^ -1") == 0.5
 
     def test_complex_expressions(self):
         """Тест сложных выражений"""
@@ -62,10 +72,174 @@ class TestCalculator:
         assert self.calc.to_reverse_polish_notation("(3 + 4) * 2") == ['3', '4', '+', '2', '*']
         assert self.calc.to_reverse_polish_notation("-5 + 3") == ['5', 'u', '3', '+']
 
+    def test_compile_cache(self):
+        """Тест повторного использования разобранного выражения"""
+        compiled = self.calc.compile("3 + 4 * 2")
+        assert compiled.evaluate() == 11
+        # Выражение, отличающееся только пробельными символами, берётся из кэша
+        assert self.calc.compile(" 3 +\t4  * 2 ") is compiled
+
+    def test_result_cache(self):
+        """Тест кэширования результатов и его очистки"""
+        assert self.calc.calculate("2 * (3 + 4)") == 14
+        with patch.object(CompiledExpression, 'evaluate') as evaluate:
+            assert self.calc.calculate(" 2 * (3 + 4) ") == 14
+            evaluate.assert_not_called()
+
+            self.calc.clear_cache()
+            evaluate.return_value = 0.0
+            assert self.calc.calculate("2 * (3 + 4)") == 0.0
+            evaluate.assert_called_once()
+
+    def test_constant_folding(self):
+        """Тест свёртки констант при построении ОПН"""
+        assert to_rpn("(3 + 4) * (5 - 2) + 2", fold=True) == [(0, 23.0)]
+        assert to_rpn("-(2 ^ 3)", fold=True) == [(0, -8.0)]
+        # Деление на ноль и комплексный результат остаются вычислению
+        assert to_rpn("1 + 5 / 0", fold=True) == [(0, 1.0), (0, 5.0), (0, 0.0), (1, OP_DIV),
+                                                  (1, OP_ADD)]
+        assert len(to_rpn("(-8) ^ 0.5", fold=True)) == 3
+        # Некорректное выражение не становится корректным
+        with pytest.raises(ValueError):
+            CompiledExpression(to_rpn("2 + + 3", fold=True))
+
+    def test_opcode_rpn(self):
+        """Тест ОПН из чисел и кодов операций"""
+        rpn = to_rpn("3 * -5")
+        assert rpn == [(0, 3.0), (0, 5.0), (1, OP_NEG), (1, OP_MUL)]
+        assert format_rpn(rpn) == ['3', '5', 'u', '*']
+        assert self.calc.evaluate_rpn(rpn) == -15
+
+        with pytest.raises(ValueError):
+            self.calc.evaluate_rpn([(0, 2.0), (1, OP_ADD)])
+
+    def test_string_rpn_round_trip(self):
+        """Тест вычисления ОПН в строковом виде"""
+        rpn = self.calc.to_reverse_polish_notation("3.5 + 4")
+        assert self.calc.evaluate_rpn(rpn) == 7.5
+        assert self.calc.evaluate_rpn(['5', 'u', '3', '+']) == -2
+        assert parse_rpn(format_rpn(to_rpn("2 ^ -1 % 3"))) == to_rpn("2 ^ -1 % 3")
+
+        with pytest.raises(ValueError):
+            self.calc.evaluate_rpn(['2', 'a', '+'])
+
+    def test_rpn_to_source(self):
+        """Тест генерации кода Python из ОПН"""
+        assert rpn_to_source(to_rpn("2 + 3 * 4")) == "((2.0)+((3.0)*(4.0)))"
+        assert rpn_to_source(to_rpn("-2 ^ 3")) == "((-(2.0))**(3.0))"
+
+        with pytest.raises(ValueError):
+            rpn_to_source([(0, 2.0), (1, OP_ADD)])
+
+    def test_deeply_nested_expression(self):
+        """Тест выражения, слишком глубокого для компилятора Python"""
+        compiled = CompiledExpression(to_rpn(" + ".join(["1"] * 500)))
+        assert compiled.backend != 'bytecode'
+        assert compiled.evaluate() == 500
+
+    def test_backends(self):
+        """Тест одинаковых результатов всех доступных способов вычисления"""
+        expressions = ["2 + 3 * 4", "-7 % 3", "2 ^ -2", "(-8) ^ 0.5", "--5 / 4",
+                       "((0 - 8) ^ 0.5) ^ 0", "0 ^ -(10 ^ 300 * 10 ^ 300)"]
+        # Промежуточные переполнение и деление на ноль, не видные в результате
+        errors = [("1 / 0", ZeroDivisionError), ("2 / 0 ^ -1", ZeroDivisionError),
+                  ("1 / 10 ^ 400", OverflowError)]
+        for backend in ['bytecode', 'cython', 'numba', 'python']:
+            try:
+                CompiledExpression([(0, 1.0)], backend)
+            except ValueError:
+                continue  # Необязательная зависимость не установлена
+
+            for expression in expressions:
+                rpn = to_rpn(expression)
+                compiled = CompiledExpression(rpn, backend)
+                assert compiled.backend == backend
+                assert compiled.evaluate() == self.calc.evaluate_rpn(rpn)
+
+            for expression, error in errors:
+                with pytest.raises(error):
+                    CompiledExpression(to_rpn(expression), backend).evaluate()
+
+        assert self.calc.compile("1 + 2").backend == 'constant'
+        with pytest.raises(ValueError):
+            CompiledExpression([(0, 1.0)], 'fortran')
+
+    def test_compile_to_arrays(self):
+        """Тест преобразования ОПН в массивы кодов операций и констант"""
+        np = pytest.importorskip("numpy")
+        ops, consts = compile_to_arrays(to_rpn("3 * -5"))
+        assert ops.dtype == np.int8
+        assert ops.tolist() == [7, 7, 6, 2]
+        assert consts.tolist() == [3.0, 5.0]
+
+        with pytest.raises(ValueError):
+            compile_to_arrays([(0, 2.0), (1, OP_ADD)])
+
+    def test_evaluate_batch(self):
+        """Тест пакетного вычисления по матрице констант"""
+        np = pytest.importorskip("numpy")
+        pytest.importorskip("numba")
+        rpn = to_rpn("1 / 2 + 3")
+        result = evaluate_batch(rpn, np.array([[1.0, 2.0, 3.0], [4.0, 4.0, 1.0]]))
+        assert result.tolist() == [3.5, 2.0]
+
+    def test_evaluate_batch_numpy(self):
+        """Тест пакетного вычисления векторными операциями NumPy"""
+        np = pytest.importorskip("numpy")
+        rpn = to_rpn("-(1 - 2) * 3 % 4 ^ 5 / 6")
+        ops, _ = compile_to_arrays(rpn)
+        consts = np.array([[1.0, 2.0, 3.0, 4.0, 5.0, 6.0], [7.0, 2.0, 5.0, 3.0, 0.5, 0.0]])
+        result = _evaluate_batch_numpy(ops, consts)
+        assert result[0] == self.calc.calculate("-(1 - 2) * 3 % 4 ^ 5 / 6")
+        assert np.isinf(result[1])
+        # Входная матрица не изменяется
+        assert consts[0].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+    def test_cython_kernel(self):
+        """Тест ядра на Cython, если расширение собрано"""
+        c_eval = pytest.importorskip("_eval")
+        for expression in ["2 + 3 * 4", "-7 % 3", "7 % -3", "(1 - 2) ^ 3", "2 ^ -2"]:
+            ops, consts = _encode(to_rpn(expression))
+            native = c_eval.eval_rpn(array('b', ops), array('d', consts))
+            assert native == self.calc.calculate(expression)
+
+        ops, consts = _encode(to_rpn("1 / (2 - 2)"))
+        with pytest.raises(ZeroDivisionError):
+            c_eval.eval_rpn(array('b', ops), array('d', consts))
+
+        # Неверная ОПН отклоняется до вычисления, а не читает чужую память
+        for ops, consts in [([7, 42], [1.0]), ([7, 1, 1, 1, 1], [1.0]),
+                            ([7, 7, 0], [1.0]), ([7], [1.0, 2.0])]:
+            with pytest.raises(ValueError):
+                c_eval.eval_rpn(array('b', ops), array('d', consts))
+
+    def test_numba_kernel(self):
+        """Тест ядра Numba на промежуточных inf/nan, которые не видны в результате"""
+        pytest.importorskip("numba")
+        with pytest.raises(OverflowError):
+            CompiledExpression(to_rpn("1 / 10 ^ 400"), 'numba').evaluate()
+        with pytest.raises(ZeroDivisionError):
+            CompiledExpression(to_rpn("2 / 0 ^ -1"), 'numba').evaluate()
+        result = CompiledExpression(to_rpn("((0 - 8) ^ 0.5) ^ 0"), 'numba').evaluate()
+        assert isinstance(result, complex)
+        huge = "-(10 ^ 300 * 10 ^ 300)"
+        assert CompiledExpression(to_rpn("0 ^ " + huge), 'numba').evaluate() == float('inf')
+
+    def test_python_float_semantics(self):
+        """Тест семантики float в Python независимо от установленных ускорителей"""
+        with pytest.raises(OverflowError):
+            self.calc.calculate("10 ^ 400")
+        with pytest.raises(ZeroDivisionError):
+            self.calc.calculate("0 ^ (0 - 1)")
+        assert isinstance(self.calc.calculate("(0 - 8) ^ 0.5"), complex)
+        # Слишком глубокое для байт-кода выражение вычисляет ядро на C или Numba
+        with pytest.raises(OverflowError):
+            self.calc.calculate("1 / 10 ^ 400 + " + " + ".join(["1"] * 300))
+
     def test_console_output(self):
         """Тест вывода в консоль"""
         with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
-            result = self.calc.calculate("2 + 3")
+            result = self.calc.calculate("2 + 3", verbose=True)
             output = mock_stdout.getvalue()
 
             assert "🧮 Вычисление выражения: 2 + 3" in output
@@ -73,6 +247,12 @@ class TestCalculator:
             assert "✅ Результат: 5.0" in output
             assert result == 5
 
+    def test_silent_by_default(self):
+        """Тест отсутствия вывода без verbose"""
+        with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            assert self.calc.calculate("2 + 3") == 5
+            assert mock_stdout.getvalue() == ""
+
     def test_division_by_zero(self):
         """Тест деления на ноль"""
         with patch('sys.stdout', new_callable=StringIO):
@@ -91,6 +271,27 @@ class TestCalculator:
             with pytest.raises(ValueError):
                 self.calc.calculate("(2 + 3")
 
+            with pytest.raises(ValueError):
+                self.calc.calculate("2 + a")
+
+            with pytest.raises(ValueError):
+                self.calc.calculate("1.2.3 + 4")
+
+            with pytest.raises(ValueError):
+                self.calc.calculate("1 2")
+
+            with pytest.raises(ValueError):
+                self.calc.calculate("2 3 +")
+
+            with pytest.raises(ValueError):
+                self.calc.calculate("1 2 3 * +")
+
+            with pytest.raises(ValueError):
+                self.calc.calculate("2 (3)")
+
+            with pytest.raises(ValueError):
+                self.calc.calculate("* 2")
+
     def test_mismatched_parentheses(self):
         """Тест несогласованных скобок"""
         with patch('sys.stdout', new_callable=StringIO):